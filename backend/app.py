@@ -5,14 +5,16 @@ from flask import (
     session, redirect, url_for
 )
 from werkzeug.utils import secure_filename
+from werkzeug.exceptions import RequestEntityTooLarge, UnsupportedMediaType
 from user_db import (
     init_db, create_user, verify_password,
     get_user_by_username, update_password,
-    list_users, is_admin
+    list_users, is_admin, get_forecast
 )
 from utils import ensure_user_csv
+from upload_stream import StreamingUploadRequest, max_upload_bytes
 import pandas as pd
-from datetime import timedelta
+from datetime import datetime, timedelta
 
 # ----------------- FLASK APP CONFIG -----------------
 BASE_DIR = Path(__file__).resolve().parent
@@ -23,6 +25,7 @@ app = Flask(
     template_folder=str(FRONTEND_DIR),
     static_folder=str(FRONTEND_DIR)
 )
+app.request_class = StreamingUploadRequest
 
 app.secret_key = os.environ.get("FLASK_SECRET", "local-dev-secret")
 app.config['SESSION_COOKIE_NAME'] = 'expense_user'
@@ -31,6 +34,8 @@ app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(minutes=20)
 
 UPLOAD_DIR = str(BASE_DIR / "uploads")
 os.makedirs(UPLOAD_DIR, exist_ok=True)
+app.config['UPLOAD_DIR'] = UPLOAD_DIR
+app.config['MAX_CONTENT_LENGTH'] = max_upload_bytes()
 
 # ✅ Ensure SQLite DB exists at startup
 init_db()
@@ -134,7 +139,15 @@ def dashboard():
     categories = df["Category"].value_counts().to_dict() if not df.empty else {}
 
     monthly = prepare_monthly_data(csv_path) if not df.empty else pd.DataFrame()
-    predicted = predict_next_month_expense(monthly) if not monthly.empty else 0.0
+
+    # Prefer the forecast precomputed by forecast_job.py, unless the ledger changed
+    # after the job read it (uploads also drop it); then train inline
+    stored = get_forecast(user)
+    ledger_time = datetime.fromtimestamp(os.path.getmtime(csv_path)).isoformat(timespec="seconds")
+    if stored and stored["updated_at"] > ledger_time:
+        predicted = stored["predicted_total"]
+    else:
+        predicted = predict_next_month_expense(monthly) if not monthly.empty else 0.0
 
     # ✅ Grouped bar datasets
     if not monthly.empty:
@@ -166,14 +179,17 @@ def dashboard():
 def upload_pdf():
     from traceback import print_exc
 
-    pdf = request.files.get("pdf")
-    if not pdf:
-        return jsonify({"error": "No PDF uploaded"}), 400
-
-    os.makedirs(UPLOAD_DIR, exist_ok=True)
-    fname = secure_filename(pdf.filename)
-    save_path = os.path.join(UPLOAD_DIR, fname)
-    pdf.save(save_path)
+    # Body is streamed to disk by StreamingUploadRequest while it is parsed
+    try:
+        pdf = request.files.get("pdf")
+        if not pdf:
+            return jsonify({"error": "No PDF uploaded"}), 400
+        # Always store as .pdf so a client-chosen extension (e.g. .csv) can't pass for a ledger
+        stem = Path(secure_filename(pdf.filename)).stem or "statement"
+        sha256 = pdf.stream.sha256
+        save_path = pdf.stream.finalize(os.path.join(UPLOAD_DIR, f"{sha256[:16]}_{stem}.pdf"))
+    except (RequestEntityTooLarge, UnsupportedMediaType) as e:
+        return jsonify({"error": e.description}), e.code
 
     user = logged_in()
     csv_path = ensure_user_csv(user)
@@ -181,12 +197,59 @@ def upload_pdf():
     try:
         from save_pdf_expense import append_transactions_from_pdf
         result = append_transactions_from_pdf(save_path, csv_path, username=user, ignore_duplicates=True)
-        return jsonify({"ok": True, "result": result})
     except Exception as e:
         print("❌ Upload failed:", e)
         print_exc()
         return jsonify({"error": str(e)}), 500
 
+    # Transactions are saved at this point; a rollup failure must not fail the upload
+    if result.get("added"):
+        from rollups import refresh_user_rollup
+        from user_db import delete_user_rollup, delete_forecast
+        try:
+            delete_forecast(user)
+        except Exception:
+            print_exc()
+        try:
+            refresh_user_rollup(user, csv_path)
+        except Exception as e:
+            print("⚠️ Rollup refresh failed, dropping it for lazy rebuild:", e)
+            try:
+                delete_user_rollup(user)
+            except Exception:
+                print_exc()
+
+    return jsonify({"ok": True, "result": result, "sha256": sha256})
+
+
+# ----------------- SUMMARY API -----------------
+@app.route("/api/summary")
+@require_login
+def api_summary():
+    """
+    Spend aggregates from the user's daily rollup.
+    Query: start, end (YYYY-MM-DD, optional), granularity (day/week/month/year),
+    categories (comma-separated, optional).
+    """
+    from rollups import summarize, GRANULARITIES
+
+    start = request.args.get("start", "").strip() or "1900-01-01"
+    end = request.args.get("end", "").strip() or "9999-12-31"
+    granularity = request.args.get("granularity", "month").strip().lower()
+    categories = [c.strip() for c in request.args.get("categories", "").split(",") if c.strip()]
+
+    try:
+        start = datetime.strptime(start, "%Y-%m-%d").strftime("%Y-%m-%d")
+        end = datetime.strptime(end, "%Y-%m-%d").strftime("%Y-%m-%d")
+    except ValueError:
+        return jsonify({"error": "start/end must be YYYY-MM-DD"}), 400
+    if start > end:
+        return jsonify({"error": "start must not be after end"}), 400
+    if granularity not in GRANULARITIES:
+        return jsonify({"error": f"granularity must be one of {', '.join(GRANULARITIES)}"}), 400
+
+    return jsonify(summarize(logged_in(), start, end, granularity, categories or None))
+
 
 # ----------------- ADMIN DASHBOARD (PRIVATE) -----------------
 @app.route("/admin/dashboard")
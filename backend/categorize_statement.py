@@ -1,5 +1,7 @@
 # backend/categorize_statement.py
 import re
+import numpy as np
+import pandas as pd
 
 # simple rule-based mapping — extend as you go
 CATEGORY_KEYWORDS = {
@@ -13,10 +15,12 @@ CATEGORY_KEYWORDS = {
     "Others": []
 }
 
+IGNORE_KEYWORDS = ["gift card", "giftcard", "cashback", "credited", "received"]
+
 def categorize_statement(text):
     txt = text.lower()
     # ignore wallet/gift card/credit/cashback — caller already filters DEBITs, but keep safe check
-    if any(k in txt for k in ["gift card", "giftcard", "cashback", "credited", "received"]):
+    if any(k in txt for k in IGNORE_KEYWORDS):
         return "Others"
 
     # person-to-person heuristics: short names, presence of "mr", "ms", "shaw", numeric-heavy names -> Others
@@ -33,3 +37,36 @@ def categorize_statement(text):
         return "Others"
 
     return "Others"
+
+
+def _keyword_pattern(keys):
+    return "|".join(re.escape(k) for k in keys)
+
+
+def categorize_series(descriptions, merchants=None):
+    """
+    Vectorized categorize_statement over a Series of descriptions.
+    Same rules and category order, one regex scan per category over the
+    distinct texts only. Returns a Series aligned with the input.
+
+    merchants (the Merchant column) keys the result on the merchant: rows are
+    categorized by their cluster's Merchant name, so every row of one merchant
+    gets the same category regardless of row order or chunking. Blank
+    merchants fall back to the row's own description.
+    """
+    text = descriptions.fillna("").astype(str)
+    if merchants is not None:
+        m = merchants.fillna("").astype(str)
+        text = m.where(m != "", text)
+
+    uniq = pd.Series(text.unique())
+    txt = uniq.str.lower()
+    conditions = [txt.str.contains(_keyword_pattern(IGNORE_KEYWORDS), regex=True)]
+    choices = ["Others"]
+    for cat, keys in CATEGORY_KEYWORDS.items():
+        if not keys:
+            continue
+        conditions.append(txt.str.contains(_keyword_pattern(keys), regex=True))
+        choices.append(cat)
+    per_text = dict(zip(uniq, np.select(conditions, choices, default="Others")))
+    return text.map(per_text)
@@ -0,0 +1,81 @@
+# backend/forecast_job.py
+"""
+Offline next-month forecasts for every user, stored in user_forecasts so the
+dashboard only has to read a number.
+
+    python forecast_job.py [--workers N] [--users a b ...] [--every MINUTES]
+
+Users are spread over a process pool; each model trains single-threaded
+(n_jobs=1) so throughput scales with cores without oversubscribing them.
+"""
+import sys
+import time
+import argparse
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from predict_expense_from_statement import (
+    prepare_monthly_data,
+    predict_next_month_expense,
+    predict_next_month_by_category
+)
+from user_db import init_db, list_users, save_forecast
+from utils import get_user_csv_path
+
+
+def forecast_user(username):
+    """
+    Returns (username, predicted_total, {category: predicted}, read_at).
+    read_at is taken before the ledger is read, so the dashboard can tell
+    whether an upload landed after the data this forecast is based on.
+    """
+    read_at = datetime.now().isoformat(timespec="seconds")
+    monthly = prepare_monthly_data(get_user_csv_path(username))
+    if monthly.empty:
+        return username, 0.0, {}, read_at
+    total = predict_next_month_expense(monthly, n_jobs=1)
+    by_category = predict_next_month_by_category(monthly, n_jobs=1)
+    return username, float(total), by_category, read_at
+
+
+def run_forecasts(users=None, workers=None):
+    users = users or [u["username"] for u in list_users()]
+    print(f"🔮 Forecasting {len(users)} users")
+
+    started = time.perf_counter()
+    done = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(forecast_user, u): u for u in users}
+        for fut in as_completed(futures):
+            user = futures[fut]
+            try:
+                username, total, by_category, read_at = fut.result()
+            except Exception as e:
+                print(f"❌ {user}: {e}")
+                continue
+            # DB writes stay in the parent so workers never contend on SQLite
+            save_forecast(username, total, by_category, read_at)
+            done += 1
+
+    elapsed = time.perf_counter() - started
+    rate = done / elapsed if elapsed else 0
+    print(f"✅ Stored {done}/{len(users)} forecasts in {elapsed:.2f}s ({rate:.1f} users/s)")
+    return done
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Precompute next-month expense forecasts.")
+    ap.add_argument("--users", nargs="*", help="only these usernames (default: all users)")
+    ap.add_argument("--workers", type=int, default=None, help="process count (default: CPU count)")
+    ap.add_argument("--every", type=float, default=None, help="repeat every N minutes instead of running once")
+    args = ap.parse_args(argv)
+
+    init_db()
+    while True:
+        run_forecasts(args.users, args.workers)
+        if not args.every:
+            return 0
+        time.sleep(args.every * 60)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+# backend/merchant_normalizer.py
+"""
+Collapse the many spellings of one merchant ("Paid to McDonalds",
+"MCDONALDS PVT LTD", "Mc Donalds 1234") into one canonical name and a
+stable merchant id.
+
+1. canonicalize each distinct description (case, punctuation, ids, legal suffixes)
+2. cluster the distinct canonical names by character-trigram Jaccard similarity,
+   comparing only names whose prefix-filter trigrams overlap (inverted index)
+3. names already known for the user keep their id; a new name joins the id of a
+   known name in its cluster, and an all-new cluster gets id = hash of its most
+   frequent member at creation time. The caller persists new assignments.
+"""
+import re
+import math
+import hashlib
+from collections import Counter, defaultdict
+import pandas as pd
+
+PREFIXES = re.compile(r"^\s*(?:paid to|payment to|sent to|paid|upi)\b[\s:\-/]*", flags=re.IGNORECASE)
+STOP_TOKENS = {"pvt", "ltd", "private", "limited", "llp", "inc", "co", "the", "and", "india", "upi", "payment"}
+
+SIMILARITY_THRESHOLD = 0.6   # trigram Jaccard needed to merge two names
+
+
+def canonicalize(description):
+    """Lowercase, strip 'Paid to' style prefixes, punctuation, numeric ids and legal suffixes."""
+    txt = PREFIXES.sub("", str(description or "")).lower()
+    txt = re.sub(r"[^a-z0-9]+", " ", txt)
+    tokens = [t for t in txt.split() if t not in STOP_TOKENS and not re.search(r"\d{3,}", t)]
+    canon = " ".join(tokens)
+    return canon or txt.strip() or "unknown"
+
+
+def _trigrams(name):
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class _UnionFind:
+    def __init__(self, n):
+        self.parent = list(range(n))
+
+    def find(self, i):
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, a, b):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+
+def cluster_names(names, threshold=SIMILARITY_THRESHOLD):
+    """
+    Groups canonical names whose trigram Jaccard similarity is >= threshold
+    (transitively). Returns a list of groups, each a sorted list of names.
+
+    Prefix filtering: with trigrams sorted rarest-first under one global order,
+    two sets with Jaccard >= t must share one of the first |g| - ceil(t*|g|) + 1
+    trigrams of each, so only those are indexed and probed.
+    """
+    names = sorted(set(names))
+    grams = [_trigrams(n) for n in names]
+    freq = Counter(t for g in grams for t in g)
+
+    index = defaultdict(list)
+    uf = _UnionFind(len(names))
+    for i, g in enumerate(grams):
+        ordered = sorted(g, key=lambda t: (freq[t], t))
+        prefix = ordered[:len(g) - math.ceil(threshold * len(g) - 1e-9) + 1]
+        candidates = set()
+        for t in prefix:
+            candidates.update(index[t])
+            index[t].append(i)
+        for j in candidates:
+            other = grams[j]
+            # length filter: Jaccard <= min/max size
+            if min(len(g), len(other)) < threshold * max(len(g), len(other)):
+                continue
+            if uf.find(i) == uf.find(j):
+                continue
+            inter = len(g & other)
+            if inter / (len(g) + len(other) - inter) >= threshold:
+                uf.union(i, j)
+
+    members = defaultdict(list)
+    for i, n in enumerate(names):
+        members[uf.find(i)].append(n)
+    return list(members.values())
+
+
+def merchant_id(name):
+    return "m_" + hashlib.sha1(name.encode("utf-8")).hexdigest()[:12]
+
+
+def normalize_merchants(descriptions, known=None):
+    """
+    descriptions: Series of raw descriptions.
+    known: {canonical name: (merchant_id, merchant)} already assigned for this user.
+
+    Returns (frame, new_entries): frame is aligned with descriptions and has
+    columns Merchant and MerchantId; new_entries holds the canonical names that
+    were not in known, in the same form as known, for the caller to persist.
+    Work is per distinct description, so repeated rows cost a dict lookup.
+    """
+    known = known or {}
+    desc = descriptions.fillna("").astype(str)
+    canon_of = {d: canonicalize(d) for d in desc.unique()}
+    canon = desc.map(canon_of)
+    counts = Counter(canon)
+
+    assigned = dict(known)
+    new_entries = {}
+    for group in cluster_names(set(counts) | set(known)):
+        anchors = sorted(known[n] for n in group if n in known)
+        if anchors:
+            anchor = tuple(anchors[0])
+        else:
+            rep = min(group, key=lambda n: (-counts[n], len(n), n))
+            anchor = (merchant_id(rep), rep)
+        for n in group:
+            if n not in assigned:
+                assigned[n] = anchor
+                new_entries[n] = anchor
+
+    return pd.DataFrame({
+        "Merchant": canon.map(lambda c: assigned[c][1]),
+        "MerchantId": canon.map(lambda c: assigned[c][0]),
+    }, index=descriptions.index), new_entries
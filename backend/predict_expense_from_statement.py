@@ -43,16 +43,8 @@ def prepare_monthly_data(csv_path):
     return pivot
 
 
-def predict_next_month_expense(monthly_df):
-    """
-    Predicts next month’s total expense using a stable random forest + rolling mean.
-    Ensures no negative values and smoother transition.
-    """
-    if monthly_df.empty:
-        return 0.0
-
-    # Use total spend per month
-    y = monthly_df.sum(axis=1).values
+def _forecast_next(y, n_jobs=None):
+    """Random forest on month index blended with a rolling mean; never negative."""
     n = len(y)
     if n < 2:
         return float(y[-1])
@@ -62,7 +54,8 @@ def predict_next_month_expense(monthly_df):
     model = RandomForestRegressor(
         n_estimators=150,
         random_state=42,
-        max_depth=5
+        max_depth=5,
+        n_jobs=n_jobs
     )
     model.fit(X, y)
 
@@ -78,3 +71,22 @@ def predict_next_month_expense(monthly_df):
     final_pred = max(blended, 0)
 
     return round(final_pred, 2)
+
+
+def predict_next_month_expense(monthly_df, n_jobs=None):
+    """
+    Predicts next month’s total expense using a stable random forest + rolling mean.
+    Ensures no negative values and smoother transition.
+    """
+    if monthly_df.empty:
+        return 0.0
+
+    # Use total spend per month
+    return _forecast_next(monthly_df.sum(axis=1).values, n_jobs=n_jobs)
+
+
+def predict_next_month_by_category(monthly_df, n_jobs=None):
+    """Same forecast as predict_next_month_expense, per category column."""
+    if monthly_df.empty:
+        return {}
+    return {str(cat): float(_forecast_next(monthly_df[cat].values, n_jobs=n_jobs)) for cat in monthly_df.columns}
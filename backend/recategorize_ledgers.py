@@ -0,0 +1,253 @@
+# backend/recategorize_ledgers.py
+"""
+Re-apply CATEGORY_KEYWORDS to every user's CSV ledger.
+
+Run after changing the rules in categorize_statement.py:
+    python recategorize_ledgers.py [--workers N] [--chunksize ROWS] [--users a b ...] [--fresh]
+
+Each ledger is streamed in chunks (never fully loaded) and categorized with the
+vectorized categorize_series. Rows go to a temp file next to the ledger, which
+replaces the original (and the user's daily rollup is rebuilt) only if at
+least one Category actually changed.
+Progress is checkpointed per user, so an interrupted run resumes where it stopped.
+The final swap happens under ledger_lock, which uploads also take; a ledger that
+changed during the run is redone rather than overwritten. On platforms without
+fcntl the lock is a no-op, leaving a small window between check and replace.
+"""
+import io
+import os
+import csv
+import sys
+import json
+import time
+import hashlib
+import argparse
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from categorize_statement import CATEGORY_KEYWORDS, IGNORE_KEYWORDS, categorize_series
+from utils import UPLOADS_DIR, get_user_csv_path, ledger_lock
+from rollups import refresh_user_rollup
+
+CHECKPOINT_DIR = UPLOADS_DIR / ".recategorize"
+DEFAULT_CHUNKSIZE = 50_000
+
+
+def rules_fingerprint():
+    """Hash of the current rules — a checkpoint from other rules is not resumed."""
+    payload = json.dumps([CATEGORY_KEYWORDS, IGNORE_KEYWORDS], sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def list_ledger_users():
+    return sorted(p.stem for p in UPLOADS_DIR.glob("*.csv"))
+
+
+def _checkpoint_path(username):
+    return CHECKPOINT_DIR / f"{username}.json"
+
+
+def _load_checkpoint(username, rules, source_mtime):
+    path = _checkpoint_path(username)
+    if not path.exists():
+        return None
+    try:
+        with open(path) as f:
+            cp = json.load(f)
+    except Exception:
+        return None
+    if cp.get("rules") != rules or cp.get("source_mtime") != source_mtime:
+        return None
+    return cp
+
+
+def _save_checkpoint(username, cp):
+    path = _checkpoint_path(username)
+    tmp = str(path) + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(cp, f)
+    os.replace(tmp, path)
+
+
+def _read_records(f, max_rows):
+    """
+    Read up to max_rows CSV records from binary handle f.
+    A line ending inside a quoted field is joined with the next one, so the
+    handle is always left on a record boundary. Returns (bytes, records read).
+    """
+    records, buf = [], b""
+    while len(records) < max_rows:
+        line = f.readline()
+        if not line:
+            break
+        buf += line
+        if buf.count(b'"') % 2 == 0:
+            records.append(buf)
+            buf = b""
+    if buf:
+        records.append(buf)
+    return b"".join(records), len(records)
+
+
+def recategorize_user(username, chunksize=DEFAULT_CHUNKSIZE, fresh=False, retries=3):
+    """
+    Stream one user's ledger through the categorizer.
+    If the ledger is rewritten (e.g. by an upload) while we stream it, our copy is
+    dropped and the user is redone from scratch, up to `retries` times.
+    Returns dict {'user', 'rows', 'changed', 'seconds', 'skipped', 'rollup_stale'}.
+    The rollup itself is rebuilt by the parent (see recategorize_all), so workers
+    never write to the database.
+    """
+    started = time.perf_counter()
+    csv_path = get_user_csv_path(username)
+    tmp_path = csv_path + ".recat"
+    rules = rules_fingerprint()
+
+    if not os.path.exists(csv_path) or os.path.getsize(csv_path) == 0:
+        return {"user": username, "rows": 0, "changed": 0, "seconds": 0.0, "skipped": True, "rollup_stale": False}
+
+    source_mtime = os.path.getmtime(csv_path)
+    cp = None if fresh else _load_checkpoint(username, rules, source_mtime)
+    if cp and cp.get("done"):
+        return {
+            "user": username,
+            "rows": cp["rows_done"],
+            "changed": cp["changed"],
+            "seconds": 0.0,
+            "skipped": True,
+            "rollup_stale": cp.get("rollup_stale", False),
+        }
+
+    if cp and os.path.exists(tmp_path) and "source_offset" in cp:
+        # Temp file holds exactly rows_done rows (it is flushed before each checkpoint)
+        rows_done, changed = cp["rows_done"], cp["changed"]
+        with open(tmp_path, "r+b") as f:
+            f.truncate(cp["tmp_bytes"])
+        out = open(tmp_path, "a", newline="")
+    else:
+        rows_done, changed = 0, 0
+        cp = {"rules": rules, "source_mtime": source_mtime}
+        out = open(tmp_path, "w", newline="")
+
+    # The source position is checkpointed as a byte offset, so resuming is a seek
+    # and memory stays constant however far into the ledger we are
+    with open(csv_path, "rb") as src, out:
+        header, _ = _read_records(src, 1)
+        names = next(csv.reader(io.StringIO(header.decode("utf-8"))))
+        if "source_offset" in cp:
+            src.seek(cp["source_offset"])
+        while True:
+            block, n = _read_records(src, chunksize)
+            if not n:
+                break
+            # Read as strings so untouched columns are written back byte-for-byte
+            chunk = pd.read_csv(io.BytesIO(block), names=names, header=None, dtype=str, keep_default_na=False)
+            if "Category" in chunk.columns and "Description" in chunk.columns:
+                merchants = chunk["Merchant"] if "Merchant" in chunk.columns else None
+                new_cat = categorize_series(chunk["Description"], merchants=merchants)
+                changed += int((chunk["Category"] != new_cat).sum())
+                chunk["Category"] = new_cat
+            chunk.to_csv(out, index=False, header=(os.path.getsize(tmp_path) == 0))
+            out.flush()
+            os.fsync(out.fileno())
+            rows_done += len(chunk)
+            cp.update(rows_done=rows_done, changed=changed, tmp_bytes=os.path.getsize(tmp_path),
+                      source_offset=src.tell(), done=False)
+            _save_checkpoint(username, cp)
+
+    # Check-and-swap under the same lock append_transactions_from_pdf holds for its
+    # read-modify-write, so an upload can't land between the check and the replace.
+    # Without fcntl (Windows) the lock is a no-op and a small window remains.
+    with ledger_lock(csv_path):
+        stale = os.path.getmtime(csv_path) != source_mtime
+        if not stale and changed:
+            os.replace(tmp_path, csv_path)
+        final_mtime = os.path.getmtime(csv_path)
+
+    if stale:
+        os.remove(tmp_path)
+        _checkpoint_path(username).unlink(missing_ok=True)
+        if retries <= 0:
+            raise RuntimeError("ledger kept changing during re-categorization")
+        print(f"🔁 {username}: ledger changed during run, starting over")
+        return recategorize_user(username, chunksize, fresh=True, retries=retries - 1)
+
+    if not changed:
+        os.remove(tmp_path)
+
+    # rollup_stale stays set until the parent has rebuilt the rollup, so a
+    # failed rebuild is retried on the next run
+    cp.update(rows_done=rows_done, changed=changed, done=True, rollup_stale=bool(changed),
+              source_mtime=final_mtime)
+    _save_checkpoint(username, cp)
+    return {
+        "user": username,
+        "rows": rows_done,
+        "changed": changed,
+        "seconds": time.perf_counter() - started,
+        "skipped": False,
+        "rollup_stale": bool(changed),
+    }
+
+
+def _refresh_rollup(username):
+    """Rebuild a user's rollup in the parent and clear the checkpoint's stale flag."""
+    try:
+        refresh_user_rollup(username)
+    except Exception as e:
+        print(f"⚠️ {username}: rollup refresh failed, will retry next run: {e}")
+        return
+    path = _checkpoint_path(username)
+    if path.exists():
+        with open(path) as f:
+            cp = json.load(f)
+        cp["rollup_stale"] = False
+        _save_checkpoint(username, cp)
+
+
+def recategorize_all(users=None, workers=None, chunksize=DEFAULT_CHUNKSIZE, fresh=False):
+    """Run recategorize_user across users in a process pool and print throughput."""
+    users = users or list_ledger_users()
+    CHECKPOINT_DIR.mkdir(exist_ok=True)
+    print(f"🔄 Re-categorizing {len(users)} ledgers (rules {rules_fingerprint()[:8]})")
+
+    started = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(recategorize_user, u, chunksize, fresh): u for u in users}
+        for fut in as_completed(futures):
+            user = futures[fut]
+            try:
+                r = fut.result()
+            except Exception as e:
+                print(f"❌ {user}: {e}")
+                continue
+            results.append(r)
+            if r["rollup_stale"]:
+                _refresh_rollup(user)
+            if r["skipped"]:
+                print(f"⏭️  {user}: already up to date")
+            else:
+                rate = r["rows"] / r["seconds"] if r["seconds"] else 0
+                print(f"✅ {user}: {r['changed']}/{r['rows']} rows changed ({rate:,.0f} rows/s)")
+
+    elapsed = time.perf_counter() - started
+    rows = sum(r["rows"] for r in results if not r["skipped"])
+    changed = sum(r["changed"] for r in results if not r["skipped"])
+    rate = rows / elapsed if elapsed else 0
+    print(f"📊 {rows} rows in {elapsed:.2f}s ({rate:,.0f} rows/s), {changed} re-categorized")
+    return results
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Re-apply category rules to all user ledgers.")
+    ap.add_argument("--users", nargs="*", help="only these usernames (default: every CSV in uploads/)")
+    ap.add_argument("--workers", type=int, default=None, help="process count (default: CPU count)")
+    ap.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="rows per chunk")
+    ap.add_argument("--fresh", action="store_true", help="ignore existing checkpoints")
+    args = ap.parse_args(argv)
+    results = recategorize_all(args.users, args.workers, args.chunksize, args.fresh)
+    return 0 if len(results) == len(args.users or list_ledger_users()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
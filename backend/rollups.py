@@ -0,0 +1,111 @@
+# backend/rollups.py
+"""
+Per-user daily rollups (spend per day per category, plus running totals)
+and range/granularity summaries answered from them instead of the raw CSV.
+"""
+import os
+from datetime import datetime, timedelta
+import pandas as pd
+from user_db import replace_user_rollup, rollup_exists, fetch_rollup_range
+from utils import get_user_csv_path
+
+GRANULARITIES = ("day", "week", "month", "year")
+ROLLUP_CHUNKSIZE = 50_000
+
+
+def build_daily_rollup(csv_path):
+    """
+    Streams the ledger in chunks and returns rows of
+    (category, day 'YYYY-MM-DD', amount, cum_amount) sorted by category, day.
+    """
+    if not os.path.exists(csv_path) or os.path.getsize(csv_path) == 0:
+        return []
+
+    partials = []
+    for chunk in pd.read_csv(csv_path, chunksize=ROLLUP_CHUNKSIZE):
+        if chunk.empty or "Amount" not in chunk.columns:
+            continue
+        day = pd.Series(pd.NaT, index=chunk.index)
+        if "ParsedDate" in chunk.columns:
+            day = pd.to_datetime(chunk["ParsedDate"], errors="coerce")
+        if "Date" in chunk.columns:
+            day = day.fillna(pd.to_datetime(chunk["Date"], errors="coerce"))
+        part = pd.DataFrame({
+            "day": day.dt.strftime("%Y-%m-%d"),
+            "category": chunk["Category"].fillna("Others") if "Category" in chunk.columns else "Others",
+            "amount": pd.to_numeric(chunk["Amount"], errors="coerce").fillna(0.0),
+        }).dropna(subset=["day"])
+        partials.append(part.groupby(["category", "day"], as_index=False)["amount"].sum())
+
+    if not partials:
+        return []
+
+    daily = pd.concat(partials, ignore_index=True).groupby(["category", "day"], as_index=False)["amount"].sum()
+    daily = daily.sort_values(["category", "day"])
+    daily["cum_amount"] = daily.groupby("category")["amount"].cumsum()
+    return list(daily[["category", "day", "amount", "cum_amount"]].itertuples(index=False, name=None))
+
+
+def refresh_user_rollup(username, csv_path=None):
+    """Rebuild and store the rollup for one user. Returns number of (category, day) rows."""
+    rows = build_daily_rollup(csv_path or get_user_csv_path(username))
+    replace_user_rollup(username, rows)
+    return len(rows)
+
+
+def _bucket(day, granularity):
+    """Returns (label, bucket_start) for a 'YYYY-MM-DD' day."""
+    if granularity == "day":
+        return day, day
+    if granularity == "month":
+        return day[:7], day[:7] + "-01"
+    if granularity == "year":
+        return day[:4], day[:4] + "-01-01"
+    d = datetime.strptime(day, "%Y-%m-%d")
+    monday = (d - timedelta(days=d.weekday())).strftime("%Y-%m-%d")
+    iso = d.isocalendar()
+    return f"{iso[0]}-W{iso[1]:02d}", monday
+
+
+def summarize(username, start_day, end_day, granularity="month", categories=None):
+    """
+    Spend between start_day and end_day (inclusive, 'YYYY-MM-DD') bucketed by
+    granularity. Bucket totals are differences of running sums, so the work is
+    proportional to the days in range, plus one indexed lookup per category.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of {', '.join(GRANULARITIES)}")
+
+    if not rollup_exists(username):
+        refresh_user_rollup(username)
+
+    baseline, rows = fetch_rollup_range(username, start_day, end_day, categories)
+
+    # last running sum seen per category; a bucket's spend = its last cum - cum before it
+    last_cum = {}
+    buckets = {}
+    for day, cat, cum in rows:
+        label, bucket_start = _bucket(day, granularity)
+        b = buckets.setdefault(label, {"period": label, "start": bucket_start, "by_category": {}})
+        b["by_category"][cat] = b["by_category"].get(cat, 0.0) + (cum - last_cum.get(cat, baseline.get(cat, 0.0)))
+        last_cum[cat] = cum
+
+    by_category = {
+        cat: round(cum - baseline.get(cat, 0.0), 2)
+        for cat, cum in last_cum.items()
+        if cum - baseline.get(cat, 0.0)
+    }
+    out = []
+    for b in buckets.values():
+        b["by_category"] = {c: round(v, 2) for c, v in b["by_category"].items()}
+        b["total"] = round(sum(b["by_category"].values()), 2)
+        out.append(b)
+
+    return {
+        "start": start_day,
+        "end": end_day,
+        "granularity": granularity,
+        "total": round(sum(by_category.values()), 2),
+        "by_category": by_category,
+        "buckets": out,
+    }
@@ -3,7 +3,10 @@ import os
 import pandas as pd
 from datetime import datetime
 from pdf_parser import extract_transactions_from_statement
-from categorize_statement import categorize_statement
+from categorize_statement import categorize_series
+from merchant_normalizer import normalize_merchants
+from utils import CSV_HEADERS, ledger_lock
+from user_db import get_merchant_ids, save_merchant_ids
 from pathlib import Path
 
 # Use uploads directory (safe for Railway)
@@ -25,6 +28,57 @@ def _safe_parse_date_str(x):
     except:
         return pd.NaT
 
+def _merge_into_ledger(df, csv_path, username, ignore_duplicates):
+    """
+    Read-modify-write of the ledger: assign merchants, categorize and append df.
+    Returns (added, total, extracted). Caller holds ledger_lock(csv_path).
+    """
+    if os.path.exists(csv_path) and os.path.getsize(csv_path) > 0:
+        try:
+            existing = pd.read_csv(csv_path)
+        except Exception:
+            existing = pd.DataFrame(columns=CSV_HEADERS)
+    else:
+        existing = pd.DataFrame(columns=CSV_HEADERS)
+
+    # Existing merchant ids are kept; only new rows (and legacy rows without an
+    # id) are normalized, against the user's persisted name -> id mapping
+    for col in ("Merchant", "MerchantId"):
+        if col not in existing.columns:
+            existing[col] = None
+        # read_csv gives an all-blank column float64, which rejects string assignment
+        existing[col] = existing[col].astype(object)
+    legacy = existing["MerchantId"].isna()
+    n_legacy = int(legacy.sum())
+    pending = pd.concat([existing.loc[legacy, "Description"], df["Description"]], ignore_index=True)
+    merchants, new_ids = normalize_merchants(pending, get_merchant_ids(username))
+    save_merchant_ids(username, new_ids)
+    if n_legacy:
+        existing.loc[legacy, "Merchant"] = merchants["Merchant"].iloc[:n_legacy].values
+        existing.loc[legacy, "MerchantId"] = merchants["MerchantId"].iloc[:n_legacy].values
+    df["Merchant"] = merchants["Merchant"].iloc[n_legacy:].values
+    df["MerchantId"] = merchants["MerchantId"].iloc[n_legacy:].values
+
+    try:
+        df["Category"] = categorize_series(df["Description"], merchants=df["Merchant"])
+    except Exception:
+        df["Category"] = "Others"
+
+    df_out = df[CSV_HEADERS].copy()
+
+    if ignore_duplicates and not existing.empty:
+        merged = pd.concat([existing, df_out], ignore_index=True)
+        merged = merged.drop_duplicates(subset=["Date", "Amount", "Description"], keep="first")
+        added = max(0, len(merged) - len(existing))
+        final = merged
+    else:
+        final = pd.concat([existing, df_out], ignore_index=True)
+        added = len(df_out)
+
+    final.to_csv(csv_path, index=False)
+    return added, len(final), len(df_out)
+
+
 def append_transactions_from_pdf(pdf_path: str, csv_path: str = None, username: str = "default", ignore_duplicates: bool = True):
     """
     Extract transactions from pdf_path and append to csv_path.
@@ -42,34 +96,11 @@ def append_transactions_from_pdf(pdf_path: str, csv_path: str = None, username:
 
     df = df[df["Amount"].astype(float) > 0].copy()
 
-    try:
-        df["Category"] = df["Description"].apply(categorize_statement)
-    except Exception:
-        df["Category"] = "Others"
-
     df["ParsedDate_dt"] = df["Date"].astype(str).apply(_safe_parse_date_str)
     df["ParsedDate"] = df["ParsedDate_dt"].apply(lambda d: d.strftime("%Y-%m-%d") if pd.notna(d) else "")
 
-    df_out = df[["Date", "Description", "Amount", "Category", "ParsedDate"]].copy()
-
-    if os.path.exists(csv_path) and os.path.getsize(csv_path) > 0:
-        try:
-            existing = pd.read_csv(csv_path)
-        except Exception:
-            existing = pd.DataFrame(columns=df_out.columns)
-    else:
-        existing = pd.DataFrame(columns=df_out.columns)
-
-    if ignore_duplicates and not existing.empty:
-        merged = pd.concat([existing, df_out], ignore_index=True)
-        merged = merged.drop_duplicates(subset=["Date", "Amount", "Description"], keep="first")
-        added = max(0, len(merged) - len(existing))
-        final = merged
-    else:
-        final = pd.concat([existing, df_out], ignore_index=True)
-        added = len(df_out)
-
-    final.to_csv(csv_path, index=False)
-    total = len(final)
-    print(f"✅ Saved {added} new transactions to {csv_path} (extracted {len(df_out)})")
-    return {"added": added, "total": total, "extracted": len(df_out)}
+    # Locked so a concurrent recategorize_ledgers run can't swap the file mid-merge
+    with ledger_lock(csv_path):
+        added, total, extracted = _merge_into_ledger(df, csv_path, username, ignore_duplicates)
+    print(f"✅ Saved {added} new transactions to {csv_path} (extracted {extracted})")
+    return {"added": added, "total": total, "extracted": extracted}
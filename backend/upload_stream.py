@@ -0,0 +1,109 @@
+# backend/upload_stream.py
+"""
+Streaming upload support: multipart file parts are written straight to disk
+in the chunks Werkzeug hands us, hashed on the fly, size-capped and checked
+for the PDF magic bytes as soon as they arrive.
+"""
+import os
+import hashlib
+import tempfile
+from flask import Request, current_app
+from werkzeug.exceptions import RequestEntityTooLarge, UnsupportedMediaType
+
+PDF_MAGIC = b"%PDF-"
+DEFAULT_MAX_UPLOAD_MB = 25
+
+
+def max_upload_bytes():
+    """Upload cap in bytes, from MAX_UPLOAD_MB (default 25)."""
+    return int(float(os.environ.get("MAX_UPLOAD_MB", DEFAULT_MAX_UPLOAD_MB)) * 1024 * 1024)
+
+
+class HashingPDFWriter:
+    """
+    File-like sink for one multipart file part.
+    Writes to a temp file in upload_dir while keeping a running sha256;
+    rejects non-PDF content on the first bytes and anything over max_bytes.
+    """
+
+    def __init__(self, upload_dir, max_bytes):
+        os.makedirs(upload_dir, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(dir=upload_dir, suffix=".part")
+        self._file = os.fdopen(fd, "w+b")
+        self._hash = hashlib.sha256()
+        self._head = b""
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.finalized = False
+
+    def write(self, data):
+        self.size += len(data)
+        if self.max_bytes and self.size > self.max_bytes:
+            self.discard()
+            raise RequestEntityTooLarge(f"Upload exceeds {self.max_bytes // (1024 * 1024)} MB limit")
+        if len(self._head) < len(PDF_MAGIC):
+            self._head += data[:len(PDF_MAGIC) - len(self._head)]
+            if not PDF_MAGIC.startswith(self._head):
+                self.discard()
+                raise UnsupportedMediaType("Uploaded file is not a PDF")
+        self._hash.update(data)
+        return self._file.write(data)
+
+    @property
+    def sha256(self):
+        return self._hash.hexdigest()
+
+    def finalize(self, dest_path):
+        """Move the completed upload to dest_path and return it."""
+        if len(self._head) < len(PDF_MAGIC):
+            self.discard()
+            raise UnsupportedMediaType("Uploaded file is not a PDF")
+        self._file.close()
+        os.replace(self.path, dest_path)
+        self.path = dest_path
+        self.finalized = True
+        return dest_path
+
+    def discard(self):
+        if not self._file.closed:
+            self._file.close()
+        if not self.finalized and os.path.exists(self.path):
+            os.remove(self.path)
+
+    # Werkzeug seeks back to 0 after parsing and closes the stream on teardown
+    def seek(self, *a):
+        return self._file.seek(*a)
+
+    def tell(self):
+        return self._file.tell()
+
+    def read(self, *a):
+        return self._file.read(*a)
+
+    def close(self):
+        self.discard()
+
+    @property
+    def closed(self):
+        return self._file.closed
+
+
+class StreamingUploadRequest(Request):
+    """Request class whose uploaded files go through HashingPDFWriter."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        writer = HashingPDFWriter(
+            current_app.config["UPLOAD_DIR"],
+            current_app.config.get("MAX_CONTENT_LENGTH"),
+        )
+        # Parts written before a later part fails never reach request.files,
+        # so keep our own list to clean them up in close()
+        self.__dict__.setdefault("_upload_writers", []).append(writer)
+        return writer
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            for writer in self.__dict__.get("_upload_writers", []):
+                writer.discard()
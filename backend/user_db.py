@@ -1,6 +1,7 @@
 # backend/user_db.py
 
 import os
+import json
 import sqlite3
 import psycopg2
 from urllib.parse import urlparse
@@ -60,6 +61,39 @@ def init_db():
             )
         """)
 
+    # Per-user daily spend per category, with running (prefix) sums
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS daily_rollups (
+            username TEXT NOT NULL,
+            category TEXT NOT NULL,
+            day TEXT NOT NULL,
+            amount REAL NOT NULL,
+            cum_amount REAL NOT NULL,
+            PRIMARY KEY (username, category, day)
+        )
+    """)
+
+    # Persisted merchant assignments, so ids never change once given out
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS merchant_ids (
+            username TEXT NOT NULL,
+            canonical TEXT NOT NULL,
+            merchant_id TEXT NOT NULL,
+            merchant TEXT NOT NULL,
+            PRIMARY KEY (username, canonical)
+        )
+    """)
+
+    # Latest offline forecast per user (see forecast_job.py)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS user_forecasts (
+            username TEXT PRIMARY KEY,
+            predicted_total REAL NOT NULL,
+            by_category TEXT,
+            updated_at TEXT NOT NULL
+        )
+    """)
+
     conn.commit()
 
     # ✅ Create default admin if empty
@@ -176,3 +210,159 @@ def is_admin(username):
     r = cur.fetchone()
     conn.close()
     return bool(r and r[0])
+
+
+# -------------------- DAILY ROLLUPS --------------------
+def replace_user_rollup(username, rows):
+    """Replace a user's rollup with rows of (category, day, amount, cum_amount)."""
+    conn = get_conn()
+    cur = conn.cursor()
+    ph = "%s" if IS_POSTGRES else "?"
+    try:
+        cur.execute(f"DELETE FROM daily_rollups WHERE username = {ph}", (username,))
+        cur.executemany(
+            f"INSERT INTO daily_rollups (username, category, day, amount, cum_amount) VALUES ({ph}, {ph}, {ph}, {ph}, {ph})",
+            [(username, c, d, float(a), float(cum)) for c, d, a, cum in rows]
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def rollup_exists(username):
+    conn = get_conn()
+    cur = conn.cursor()
+    ph = "%s" if IS_POSTGRES else "?"
+    try:
+        cur.execute(f"SELECT 1 FROM daily_rollups WHERE username = {ph} LIMIT 1", (username,))
+        return cur.fetchone() is not None
+    finally:
+        conn.close()
+
+
+def delete_user_rollup(username):
+    """Drop a user's rollup; summarize() rebuilds it on next use."""
+    conn = get_conn()
+    cur = conn.cursor()
+    ph = "%s" if IS_POSTGRES else "?"
+    try:
+        cur.execute(f"DELETE FROM daily_rollups WHERE username = {ph}", (username,))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def fetch_rollup_range(username, start_day, end_day, categories=None):
+    """
+    Returns (baseline, rows):
+      rows     — [(day, category, cum_amount)] for start_day <= day <= end_day, ordered by day
+      baseline — {category: cum_amount on the last day before start_day}, for the
+                 categories present in rows (one primary-key lookup each)
+    """
+    conn = get_conn()
+    cur = conn.cursor()
+    ph = "%s" if IS_POSTGRES else "?"
+    cat_sql, cat_args = "", []
+    if categories:
+        cat_sql = f" AND category IN ({', '.join([ph] * len(categories))})"
+        cat_args = list(categories)
+    try:
+        cur.execute(f"""
+            SELECT day, category, cum_amount FROM daily_rollups
+            WHERE username = {ph}{cat_sql} AND day >= {ph} AND day <= {ph}
+            ORDER BY day
+        """, [username] + cat_args + [start_day, end_day])
+        rows = cur.fetchall()
+
+        baseline = {}
+        for cat in sorted({r[1] for r in rows}):
+            cur.execute(f"""
+                SELECT cum_amount FROM daily_rollups
+                WHERE username = {ph} AND category = {ph} AND day < {ph}
+                ORDER BY day DESC LIMIT 1
+            """, (username, cat, start_day))
+            r = cur.fetchone()
+            if r:
+                baseline[cat] = r[0]
+        return baseline, rows
+    finally:
+        conn.close()
+
+
+# -------------------- MERCHANT IDS --------------------
+def get_merchant_ids(username):
+    """Returns {canonical name: (merchant_id, merchant)} for a user."""
+    conn = get_conn()
+    cur = conn.cursor()
+    ph = "%s" if IS_POSTGRES else "?"
+    try:
+        cur.execute(f"SELECT canonical, merchant_id, merchant FROM merchant_ids WHERE username = {ph}", (username,))
+        return {r[0]: (r[1], r[2]) for r in cur.fetchall()}
+    finally:
+        conn.close()
+
+
+def save_merchant_ids(username, entries):
+    """Stores new {canonical name: (merchant_id, merchant)}; existing names are left as they are."""
+    if not entries:
+        return
+    conn = get_conn()
+    cur = conn.cursor()
+    ph = "%s" if IS_POSTGRES else "?"
+    try:
+        cur.executemany(
+            f"INSERT INTO merchant_ids (username, canonical, merchant_id, merchant) VALUES ({ph}, {ph}, {ph}, {ph}) ON CONFLICT (username, canonical) DO NOTHING",
+            [(username, c, mid, name) for c, (mid, name) in entries.items()]
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+# -------------------- FORECASTS --------------------
+def save_forecast(username, predicted_total, by_category, updated_at):
+    conn = get_conn()
+    cur = conn.cursor()
+    ph = "%s" if IS_POSTGRES else "?"
+    try:
+        cur.execute(f"""
+            INSERT INTO user_forecasts (username, predicted_total, by_category, updated_at)
+            VALUES ({ph}, {ph}, {ph}, {ph})
+            ON CONFLICT (username) DO UPDATE SET
+                predicted_total = excluded.predicted_total,
+                by_category = excluded.by_category,
+                updated_at = excluded.updated_at
+        """, (username, float(predicted_total), json.dumps(by_category), updated_at))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def get_forecast(username):
+    conn = get_conn()
+    cur = conn.cursor()
+    ph = "%s" if IS_POSTGRES else "?"
+    try:
+        cur.execute(f"SELECT predicted_total, by_category, updated_at FROM user_forecasts WHERE username = {ph}", (username,))
+        r = cur.fetchone()
+        if not r:
+            return None
+        return {
+            "predicted_total": r[0],
+            "by_category": json.loads(r[1]) if r[1] else {},
+            "updated_at": r[2]
+        }
+    finally:
+        conn.close()
+
+
+def delete_forecast(username):
+    """Drop a stale forecast; the dashboard trains inline until the job stores a new one."""
+    conn = get_conn()
+    cur = conn.cursor()
+    ph = "%s" if IS_POSTGRES else "?"
+    try:
+        cur.execute(f"DELETE FROM user_forecasts WHERE username = {ph}", (username,))
+        conn.commit()
+    finally:
+        conn.close()
@@ -2,12 +2,18 @@
 import os
 import csv
 from pathlib import Path
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, ledger_lock is a no-op
+    fcntl = None
 
 # Use uploads folder (writable on Railway)
 UPLOADS_DIR = Path(__file__).resolve().parent / "uploads"
 UPLOADS_DIR.mkdir(exist_ok=True)
 
-CSV_HEADERS = ["Date", "Description", "Amount", "Category", "ParsedDate"]
+CSV_HEADERS = ["Date", "Description", "Amount", "Category", "ParsedDate", "Merchant", "MerchantId"]
 
 def get_user_csv_path(username: str) -> str:
     """Returns full path to the user's CSV file."""
@@ -21,3 +27,20 @@ def ensure_user_csv(username: str):
             w = csv.writer(f)
             w.writerow(CSV_HEADERS)
     return csv_path
+
+
+@contextmanager
+def ledger_lock(csv_path: str):
+    """
+    Exclusive advisory lock on a ledger (<ledger>.lock next to it).
+    Hold it around any read-modify-write or replace of a user CSV.
+    """
+    if fcntl is None:
+        yield
+        return
+    with open(csv_path + ".lock", "w") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)